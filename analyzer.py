@@ -0,0 +1,889 @@
+import streamlit as st
+import os
+from googleapiclient.discovery import build
+from googleapiclient.errors import HttpError
+from googleapiclient.http import HttpRequest
+import httplib2
+import threading
+import logging
+import time
+import random
+from datetime import datetime, timedelta, timezone
+from zoneinfo import ZoneInfo
+from typing import List, Dict, Optional
+import re
+import heapq
+import string
+from functools import lru_cache
+from operator import attrgetter, itemgetter
+from dataclasses import dataclass, fields
+from concurrent.futures import Future, ThreadPoolExecutor, as_completed
+
+from cache import ResponseCache
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+    import json
+
+try:
+    import ahocorasick
+except ImportError:
+    ahocorasick = None
+
+@dataclass(slots=True)
+class Hook:
+    """A candidate hook segment inside a video."""
+    start_time: int
+    duration: int
+    relevance_score: float
+    segment_type: str
+    title: str
+    url: str = ''
+    type: str = ''
+    context: str = ''
+    # Ranking score; transcript matches get a 1.2x boost
+    sort_key: float = 0.0
+
+    def to_dict(self) -> Dict:
+        """Exported fields; sort_key is internal to ranking and left out."""
+        return {name: getattr(self, name) for name in _HOOK_EXPORT_FIELDS}
+
+_HOOK_EXPORT_FIELDS = tuple(f.name for f in fields(Hook) if f.name != 'sort_key')
+
+logger = logging.getLogger(__name__)
+
+def get_api_key() -> str:
+    """Read API key from Streamlit secrets or environment."""
+    try:
+        return st.secrets["youtube_api_key"]
+    except (KeyError, FileNotFoundError):
+        try:
+            script_dir = os.path.dirname(os.path.abspath(__file__))
+            api_file_path = os.path.join(script_dir, 'api.txt')
+            
+            with open(api_file_path, 'r') as file:
+                api_key = file.read().strip()
+                
+            if not api_key:
+                raise ValueError("API key is empty")
+                
+            return api_key
+        except FileNotFoundError:
+            raise FileNotFoundError(
+                "api.txt file not found. Please create api.txt file in the same "
+                "directory as this script and paste your YouTube API key in it."
+            )
+        except Exception as e:
+            raise Exception(f"Error reading API key: {str(e)}")
+
+class QuotaExceededError(Exception):
+    """Raised before an API call that would exceed today's quota."""
+
+class QuotaTracker:
+    """Track YouTube Data API units spent today.
+    
+    The daily quota resets at midnight Pacific time. Usage is counted
+    in-process, per analyzer (i.e. per API key).
+    """
+    _PACIFIC = ZoneInfo('America/Los_Angeles')
+
+    def __init__(self, daily_limit: int = 10000):
+        self.daily_limit = daily_limit
+        self._day = None
+        self._used = 0
+        self._lock = threading.Lock()
+
+    def _roll_over(self):
+        today = datetime.now(self._PACIFIC).date()
+        if today != self._day:
+            self._day = today
+            self._used = 0
+
+    @property
+    def remaining(self) -> int:
+        with self._lock:
+            self._roll_over()
+            return max(0, self.daily_limit - self._used)
+
+    def reserve(self, cost: int) -> bool:
+        """Charge cost units if they fit in today's remaining quota."""
+        with self._lock:
+            self._roll_over()
+            if self._used + cost > self.daily_limit:
+                return False
+            self._used += cost
+            return True
+
+    def exhaust(self):
+        """Mark the quota as spent until the next reset."""
+        with self._lock:
+            self._roll_over()
+            self._used = self.daily_limit
+
+# httplib2.Http is not thread-safe, so every thread (Streamlit session or
+# worker) gets its own keep-alive connection
+_thread_local = threading.local()
+
+def _thread_http() -> httplib2.Http:
+    """This thread's httplib2 client, created on first use."""
+    http = getattr(_thread_local, 'http', None)
+    if http is None:
+        http = _thread_local.http = httplib2.Http(timeout=10)
+    return http
+
+def _build_request(http, *args, **kwargs) -> HttpRequest:
+    """requestBuilder for build(): bind each request (and so each batch) to this thread's client."""
+    return HttpRequest(_thread_http(), *args, **kwargs)
+
+# Attempts per API request, and the cap on requests in flight at once
+API_MAX_TRIES = 4
+_api_slots = threading.Semaphore(3)
+
+def _is_retryable(error: HttpError) -> bool:
+    """Rate limiting and server errors are worth retrying; quota exhaustion is not."""
+    status = error.resp.status
+    if status == 403:
+        content = error.content or b''
+        return b'rateLimitExceeded' in content or b'userRateLimitExceeded' in content
+    return status in (429, 500, 503)
+
+def _execute(request, quota: QuotaTracker, cost: int) -> Dict:
+    """Execute an API request, charging its cost to the quota tracker.
+    
+    Rate-limit and server errors are retried with exponential backoff and
+    jitter; each attempt is charged, as YouTube bills failed calls too.
+    """
+    for attempt in range(API_MAX_TRIES):
+        if not quota.reserve(cost):
+            raise QuotaExceededError(f"Not enough quota left today for a {cost}-unit request")
+        try:
+            with _api_slots:
+                return request.execute()
+        except HttpError as e:
+            if e.resp.status == 403 and b'quotaExceeded' in (e.content or b''):
+                quota.exhaust()
+                raise
+            if not _is_retryable(e) or attempt == API_MAX_TRIES - 1:
+                raise
+        time.sleep(2 ** attempt + random.random())
+
+# Partial response mask: only the fields analyze_videos reads
+VIDEO_FIELDS = (
+    'etag,items(id,snippet(title,description,publishedAt,channelTitle,categoryId,tags),'
+    'statistics(viewCount,likeCount),contentDetails(duration))'
+)
+
+@lru_cache(maxsize=64)
+def _keyword_matcher(keywords: frozenset):
+    """Build a function returning the set of keywords found in a text.
+    
+    Uses an Aho-Corasick automaton when pyahocorasick is installed, so all
+    keywords (including overlapping ones) are found in a single pass.
+    Otherwise falls back to one compiled regex alternation inside a
+    lookahead, which finds the same set.
+    """
+    if not keywords:
+        return lambda text: set()
+    
+    if ahocorasick is not None:
+        automaton = ahocorasick.Automaton()
+        for word in keywords:
+            automaton.add_word(word, word)
+        automaton.make_automaton()
+        return lambda text: {word for _, word in automaton.iter(text)}
+    
+    # The zero-width lookahead tries every position, so overlapping keywords
+    # ("abc" and "bcd" in "abcd") are all found. It captures the longest
+    # keyword starting there, which also credits the keywords it starts
+    # with ("game" in "gamer") and, at later positions, those it contains
+    ordered = sorted(keywords, key=len, reverse=True)
+    pattern = re.compile('(?=(' + '|'.join(re.escape(word) for word in ordered) + '))')
+    prefixes = {
+        word: frozenset(other for other in ordered if word.startswith(other))
+        for word in ordered
+    }
+    return lambda text: set().union(*(prefixes[match] for match in pattern.findall(text)))
+
+# YouTube's contentDetails.duration, e.g. "PT1H2M3S", "P1DT2H" or "P0D"
+_DURATION_RE = re.compile(r'P(?:(\d+)D)?(?:T(?:(\d+)H)?(?:(\d+)M)?(?:(\d+)S)?)?')
+
+@lru_cache(maxsize=256)
+def _duration_seconds(duration_str: str) -> int:
+    """Parse a YouTube ISO 8601 duration once per distinct string."""
+    match = _DURATION_RE.fullmatch(duration_str)
+    if match is None:
+        raise ValueError(f"Unsupported duration: {duration_str!r}")
+    days, hours, minutes, secs = (int(x) if x else 0 for x in match.groups())
+    return days * 86400 + hours * 3600 + minutes * 60 + secs
+
+def _format_seconds(total: int) -> str:
+    """H:MM:SS, as str(timedelta) renders it but without building a timedelta."""
+    hours, rem = divmod(int(total), 3600)
+    minutes, secs = divmod(rem, 60)
+    return f"{hours}:{minutes:02d}:{secs:02d}"
+
+# Extra attempts for a transcript download that fails at the network level
+TRANSCRIPT_RETRIES = 1
+
+@st.cache_data(ttl=604800, show_spinner=False)
+def _fetch_transcript(video_id: str) -> List[Dict]:
+    """Fetch a video transcript, cached for 7 days."""
+    # Imported lazily: the transcript client is only needed with captions on
+    import requests
+    from youtube_transcript_api import (
+        YouTubeTranscriptApi, TranscriptsDisabled, NoTranscriptFound, NoTranscriptAvailable,
+        VideoUnavailable, InvalidVideoId, TooManyRequests, YouTubeRequestFailed
+    )
+    for attempt in range(TRANSCRIPT_RETRIES + 1):
+        try:
+            return YouTubeTranscriptApi.get_transcript(video_id)
+        except (TooManyRequests, YouTubeRequestFailed, requests.RequestException):
+            # Rate limits, 5xx responses and network failures are transient
+            # (the first two subclass CouldNotRetrieveTranscript): back off and
+            # retry, then let it propagate so the miss is not cached for the full TTL
+            if attempt == TRANSCRIPT_RETRIES:
+                raise
+            time.sleep(0.2 * (attempt + 1))
+        except (TranscriptsDisabled, NoTranscriptFound, NoTranscriptAvailable,
+                VideoUnavailable, InvalidVideoId):
+            # Lasting: this video has no usable transcript
+            return []
+
+# The cached API calls below take the client and its quota tracker unhashed,
+# so they also take the plain api_key: each key gets its own cache entries
+# (and charges its own tracker) instead of reusing another key's results
+class _NoResults(Exception):
+    """Raised inside a cached call so that an empty result is not stored."""
+
+@st.cache_data(ttl=3600, max_entries=256, show_spinner=False)
+def _search_hits(_youtube, _quota: QuotaTracker, api_key: str, query: str, max_results: int,
+                 duration_type: str, order_by: str, region_code: str, days_ago: int) -> List[str]:
+    """Run the 100-unit search call, caching non-empty results for an hour."""
+    past_date = (datetime.now(timezone.utc) - timedelta(days=days_ago)).strftime('%Y-%m-%dT%H:%M:%SZ')
+    
+    search_params = {
+        'q': query,
+        'type': 'video',
+        'part': 'id',
+        'maxResults': max_results,
+        'order': order_by,
+        'regionCode': region_code,
+        'publishedAfter': past_date
+    }
+    
+    if duration_type != 'any':
+        search_params['videoDuration'] = duration_type
+
+    search_response = _execute(
+        _youtube.search().list(**search_params, fields='items/id/videoId'), _quota, 100
+    )
+    video_ids = [item['id']['videoId'] for item in search_response.get('items', [])]
+    if not video_ids:
+        raise _NoResults
+    return video_ids
+
+@st.cache_data(ttl=300, max_entries=256, show_spinner=False)
+def _search_video_ids(_youtube, _quota: QuotaTracker, api_key: str, query: str, max_results: int,
+                      duration_type: str, order_by: str, region_code: str, days_ago: int) -> List[str]:
+    """Video ids for a search; an empty result is only kept for 5 minutes."""
+    try:
+        return _search_hits(_youtube, _quota, api_key, query, max_results, duration_type,
+                            order_by, region_code, days_ago)
+    except _NoResults:
+        return []
+
+@st.cache_data(ttl=86400, max_entries=256, show_spinner=False)
+def _uploads_playlist_id(_youtube, _quota: QuotaTracker, api_key: str, channel: str) -> str:
+    """Resolve a channel id to its uploads playlist (1 unit, cached 24 hours).
+    
+    Only 'UC...' ids are supported: the discovery document bundled with the
+    pinned google-api-python-client has no channels.list forHandle parameter.
+    """
+    response = _execute(_youtube.channels().list(
+        part='contentDetails',
+        fields='items/contentDetails/relatedPlaylists/uploads',
+        id=channel
+    ), _quota, 1)
+    items = response.get('items')
+    return items[0]['contentDetails']['relatedPlaylists']['uploads'] if items else ''
+
+@st.cache_data(ttl=3600, max_entries=256, show_spinner=False)
+def _channel_video_ids(_youtube, _quota: QuotaTracker, api_key: str, channel: str, max_results: int,
+                       days_ago: int) -> List[str]:
+    """List a channel's recent uploads at 1 unit per 50-item page instead of a 100-unit search."""
+    uploads_id = _uploads_playlist_id(_youtube, _quota, api_key, channel)
+    if not uploads_id:
+        return []
+    
+    cutoff = datetime.now(timezone.utc) - timedelta(days=days_ago)
+    video_ids = []
+    page_token = None
+    while True:
+        response = _execute(_youtube.playlistItems().list(
+            part='contentDetails',
+            playlistId=uploads_id,
+            maxResults=50,
+            pageToken=page_token,
+            fields='nextPageToken,items/contentDetails(videoId,videoPublishedAt)'
+        ), _quota, 1)
+        for item in response.get('items', []):
+            details = item['contentDetails']
+            published = details.get('videoPublishedAt')
+            # Uploads are listed newest first, so the first old one ends the scan
+            if published and datetime.fromisoformat(published.replace('Z', '+00:00')) < cutoff:
+                return video_ids
+            video_ids.append(details['videoId'])
+            if len(video_ids) >= max_results:
+                return video_ids
+        page_token = response.get('nextPageToken')
+        if not page_token:
+            return video_ids
+
+@st.cache_resource(show_spinner=False)
+def _response_cache() -> ResponseCache:
+    """On-disk API response cache shared by every session of this server."""
+    return ResponseCache()
+
+def clear_response_cache():
+    """Drop every API response stored on disk (st.cache_data is cleared separately)."""
+    _response_cache().clear()
+
+@st.cache_data(ttl=86400, max_entries=256, show_spinner=False)
+def _get_video_details(_youtube, _quota: QuotaTracker, api_key: str, video_ids: tuple) -> Dict:
+    """Fetch video details for a tuple of ids, cached for 24 hours.
+    
+    Responses are also kept on disk: a fresh copy (under 6 hours old) is
+    used as is, and a stale one is revalidated with its ETag so an
+    unchanged batch comes back as an empty 304.
+    """
+    disk_cache = _response_cache()
+    key = ','.join(video_ids)
+    cached = disk_cache.get(key)
+    if cached is not None and cached[2]:
+        return cached[1]
+    
+    request = _youtube.videos().list(
+        part='snippet,statistics,contentDetails',
+        id=key,
+        fields=VIDEO_FIELDS
+    )
+    if cached is not None and cached[0]:
+        request.headers['If-None-Match'] = cached[0]
+    try:
+        response = _execute(request, _quota, 1)
+    except HttpError as e:
+        if e.resp.status == 304:
+            disk_cache.touch(key)
+            return cached[1]
+        raise
+    disk_cache.put(key, response.get('etag', ''), response)
+    return response
+
+# videos.list accepts at most 50 ids per call, still at 1 unit
+VIDEO_BATCH_SIZE = 50
+
+def _video_items(_youtube, _quota: QuotaTracker, api_key: str, video_ids: List[str]) -> List[Dict]:
+    """Video detail items in video_ids order, fetched in 50-id batches.
+    
+    Each batch is cached under its sorted ids, so the same result set seen
+    in a different order (another sort option, a channel listing) is a hit.
+    """
+    by_id = {}
+    for start in range(0, len(video_ids), VIDEO_BATCH_SIZE):
+        batch = tuple(sorted(video_ids[start:start + VIDEO_BATCH_SIZE]))
+        for item in _get_video_details(_youtube, _quota, api_key, batch).get('items', []):
+            by_id[item['id']] = item
+    # Deleted or private videos have no item
+    return [by_id[video_id] for video_id in video_ids if video_id in by_id]
+
+class YouTubeLiteAnalyzer:
+    # Cap on transcript downloads queued in the background at once
+    MAX_PREFETCH = 20
+    # Description lines scanned for chapter timestamps
+    MAX_DESCRIPTION_LINES = 200
+    # "[H:]MM:SS Title" chapter lines in video descriptions, also bracketed or
+    # with a separator after the time ("(0:00) Intro", "[0:00] Intro", "0:00 - Intro")
+    _CHAPTER_RE = re.compile(r'^\s*[(\[]?(?:(\d{1,2}):)?(\d{1,2}):(\d{2})\b\s*[-–|)\]]?\s*(.+?)\s*$')
+    # Cheap whole-description pre-check for any line starting with a timestamp
+    _HAS_CHAPTER_RE = re.compile(r'^\s*[(\[]?(?:\d{1,2}:)?\d{1,2}:\d{2}\b', re.MULTILINE)
+    REGIONS = {
+        'US': 'United States',
+        'GB': 'United Kingdom',
+        'CA': 'Canada',
+        'AU': 'Australia',
+        'BR': 'Brazil',
+        'PH': 'Philippines',
+        'IN': 'India',
+        'DE': 'Germany',
+        'FR': 'France',
+        'JP': 'Japan'
+    }
+    REGION_OPTIONS = tuple(REGIONS)
+    DURATION_RANGES = {
+        'short': 'short',        # < 4 minutes
+        'medium': 'medium',      # 4-20 minutes
+        'long': 'long',         # > 20 minutes
+        'any': None             # Any duration
+    }
+
+    def __init__(self, api_key: str):
+        """Initialize YouTube API client with enhanced configuration."""
+        # Part of every cached API call's key
+        self.api_key = api_key
+        # Use the discovery document bundled with googleapiclient (no HTTP fetch).
+        # The analyzer is shared by all sessions on this key, so requests are
+        # sent over a per-thread connection rather than one shared client
+        self.youtube = build('youtube', 'v3', developerKey=api_key,
+                             requestBuilder=_build_request,
+                             static_discovery=True, cache_discovery=False)
+        # Common engagement indicators for segment analysis
+        self.engagement_indicators = [
+            'highlight', 'best', 'top', 'important', 'key', 
+            'main', 'crucial', 'must see', 'amazing', 
+            'awesome', 'perfect'
+        ]
+        # Single words match by set lookup, multi-word phrases by substring
+        self._engagement_words = frozenset(i for i in self.engagement_indicators if ' ' not in i)
+        self._engagement_phrases = tuple(i for i in self.engagement_indicators if ' ' in i)
+        self.quota = QuotaTracker()
+        # Background transcript warm-up for searches run without captions,
+        # shared by every session using this analyzer
+        self._prefetch_pool = ThreadPoolExecutor(max_workers=4)
+        self._prefetch_lock = threading.Lock()
+        self._prefetching = {}
+
+    @staticmethod
+    @lru_cache(maxsize=64)
+    def _quota_costs(max_results: int, use_captions: bool, channel_mode: bool = False) -> tuple:
+        """Fixed per-search unit costs: (search, video details, captions, total)."""
+        # Channel mode: channels.list plus one playlistItems page per 50 uploads
+        search_cost = 1 + (max_results + 49) // 50 if channel_mode else 100
+        video_details_cost = 1
+        caption_cost = 75 if use_captions else 0
+        
+        total_video_costs = video_details_cost * max_results
+        total_caption_costs = caption_cost * max_results if use_captions else 0
+        
+        total_cost = search_cost + total_video_costs + total_caption_costs
+        return search_cost, total_video_costs, total_caption_costs, total_cost
+
+    def calculate_quota_cost(self, max_results: int, use_captions: bool = False,
+                             channel_mode: bool = False) -> dict:
+        """Calculate estimated API quota usage."""
+        search_cost, total_video_costs, total_caption_costs, total_cost = \
+            self._quota_costs(max_results, use_captions, channel_mode)
+        
+        return {
+            'search_cost': search_cost,
+            'video_details_cost': total_video_costs,
+            'caption_cost': total_caption_costs,
+            'total_cost': total_cost,
+            'daily_limit': self.quota.daily_limit,
+            'remaining': self.quota.remaining,
+            'remaining_after': self.quota.remaining - total_cost
+        }
+
+    def _get_captions(self, video_id: str, future: Optional[Future] = None) -> List[Dict]:
+        """Get video captions using YouTube Transcript API.
+        
+        future is a download already started for this video, if any.
+        Captions are optional: any failure (network errors after retries, or
+        an unparseable transcript body) only skips captions for this video.
+        """
+        try:
+            if future is not None:
+                return future.result()
+            return _fetch_transcript(video_id)
+        except Exception:
+            logger.warning("Skipping captions for video %s", video_id, exc_info=True)
+            return []
+
+    def _prefetch_captions(self, video_ids: List[str]):
+        """Warm the transcript cache in the background so enabling captions is instant."""
+        with self._prefetch_lock:
+            self._prefetching = {vid: f for vid, f in self._prefetching.items() if not f.done()}
+            for video_id in video_ids:
+                if len(self._prefetching) >= self.MAX_PREFETCH:
+                    break
+                if video_id not in self._prefetching:
+                    self._prefetching[video_id] = self._prefetch_pool.submit(_fetch_transcript, video_id)
+
+    def _analyze_captions(self, video_id: str, search_terms: frozenset,
+                          caption_future: Optional[Future] = None) -> List[Hook]:
+        """Analyze video captions for keyword matches."""
+        caption_segments = []
+        captions = self._get_captions(video_id, caption_future)
+        
+        if not captions:
+            return []
+        
+        find_keywords = _keyword_matcher(search_terms)
+        # Loop-invariant lookups bound once
+        append = caption_segments.append
+        n_terms = len(search_terms)
+        
+        # Analyze each caption segment
+        for i, caption in enumerate(captions):
+            text = caption['text'].lower()
+            start_time = caption['start']
+            
+            # Count distinct keywords found in one pass
+            matching_words = len(find_keywords(text))
+            if matching_words > 0:
+                relevance_score = matching_words / n_terms
+                
+                append(Hook(
+                    type='transcript_match',
+                    start_time=int(start_time),
+                    duration=5,
+                    title=f"Keyword mention: {text[:50]}...",
+                    relevance_score=relevance_score,
+                    segment_type='transcript_match'
+                ))
+        
+        # Return top 3 caption matches
+        return heapq.nlargest(3, caption_segments, key=lambda x: x.relevance_score)
+
+    def _analyze_segments(self, video_data: Dict, search_terms: frozenset, use_captions: bool = False,
+                          caption_future: Optional[Future] = None) -> List[Hook]:
+        """Analyze video segments for relevance and popularity.
+        
+        search_terms is the lower-cased keyword set built once per search.
+        """
+        hooks = []
+        find_keywords = _keyword_matcher(search_terms)
+        base_url = video_data['url']
+        max_seconds = int(video_data['duration']['seconds'])
+        
+        # Add opening hook
+        hooks.append(Hook(
+            type='opening',
+            start_time=0,
+            duration=5,
+            url=f"{base_url}&t=0s",
+            relevance_score=1.0,
+            segment_type='intro',
+            title='Opening Hook'
+        ))
+        
+        # Get caption-based segments if enabled
+        if use_captions:
+            caption_segments = self._analyze_captions(video_data['video_id'], search_terms, caption_future)
+            for segment in caption_segments:
+                segment.url = f"{base_url}&t={segment.start_time}s"
+                hooks.append(segment)
+        
+        # Parse description for chapters and analyze them
+        description = video_data.get('description', '')
+        if self._HAS_CHAPTER_RE.search(description):
+            # Chapter lists sit near the top; skip the rest of long descriptions
+            description_lines = description.split('\n', self.MAX_DESCRIPTION_LINES)
+            del description_lines[self.MAX_DESCRIPTION_LINES:]
+        else:
+            # Most videos have no chapters; one regex scan rules them out
+            description_lines = []
+        lines_lower = [line.lower() for line in description_lines]
+        chapters = []
+        
+        # Chapter score weights per matched keyword, fixed for the whole search
+        if search_terms:
+            title_weight = 0.6 / len(search_terms)
+            context_weight = 0.2 / len(search_terms)
+            base_score = 0.0
+        else:
+            title_weight = context_weight = 0.0
+            base_score = 0.3  # neutral 0.5 relevance at 0.6 weight
+        
+        # Loop-invariant lookups bound once
+        match_chapter = self._CHAPTER_RE.match
+        engagement_words = self._engagement_words
+        engagement_phrases = self._engagement_phrases
+        append = chapters.append
+        n_lines = len(description_lines)
+        
+        misses_since_chapter = None
+        for idx, line in enumerate(description_lines):
+            # Extract timestamp and title
+            match = match_chapter(line)
+            if not match:
+                if misses_since_chapter is not None:
+                    misses_since_chapter += 1
+                    # Two non-chapter lines after a chapter block mean it has ended
+                    if misses_since_chapter >= 2:
+                        break
+                continue
+            misses_since_chapter = 0
+            
+            hours, minutes, secs, title = match.groups()
+            seconds = int(hours or 0) * 3600 + int(minutes) * 60 + int(secs)
+            
+            if seconds >= max_seconds:
+                continue
+            
+            # Calculate relevance score
+            title_lower = title.lower()
+            title_words = set(title_lower.split())
+            matching_words = sum(1 for word in title_words if word in search_terms)
+            
+            # Context analysis
+            context_start = max(0, idx - 2)
+            context_end = min(n_lines, idx + 3)
+            context = ' '.join(lines_lower[context_start:context_end])
+            
+            context_matches = len(find_keywords(context))
+            
+            engagement_boost = bool(engagement_words & title_words) or any(
+                phrase in title_lower for phrase in engagement_phrases
+            )
+            
+            final_score = base_score + matching_words * title_weight + context_matches * context_weight
+            if engagement_boost:
+                final_score += 0.2
+            
+            segment_type = 'engagement' if engagement_boost else 'keyword_match'
+            
+            # Plain tuples; Hook records are only built for the chapters kept
+            append((final_score, seconds, title, context, segment_type))
+        
+        for final_score, seconds, title, context, segment_type in heapq.nlargest(
+                5, chapters, key=itemgetter(0)):
+            hooks.append(Hook(
+                start_time=seconds,
+                title=title.strip(),
+                relevance_score=final_score,
+                context=context,
+                segment_type=segment_type,
+                duration=5,
+                url=f"{base_url}&t={seconds}s"
+            ))
+        
+        for hook in hooks:
+            hook.sort_key = hook.relevance_score * (1.2 if hook.segment_type == 'transcript_match' else 1.0)
+        hooks.sort(key=attrgetter('sort_key'), reverse=True)
+        
+        return hooks
+
+    def _process_video(self, video: Dict, search_terms: frozenset, region_code: str,
+                       now_utc: datetime, use_captions: bool = False,
+                       caption_future: Optional[Future] = None) -> Optional[Dict]:
+        """Build the analyzed record for one videos().list item.
+        
+        Returns None for items missing the parts the record needs.
+        """
+        snippet = video.get('snippet')
+        duration_str = video.get('contentDetails', {}).get('duration')
+        if not snippet or not duration_str or 'publishedAt' not in snippet:
+            return None
+        statistics = video.get('statistics', {})
+        
+        duration_sec = _duration_seconds(duration_str)
+        
+        view_count = int(statistics.get('viewCount', 0))
+        like_count = int(statistics.get('likeCount', 0))
+        
+        publish_date = datetime.fromisoformat(
+            snippet['publishedAt'].replace('Z', '+00:00')
+        )
+        
+        days_since_publish = (now_utc - publish_date).days
+        
+        video_data = {
+            'title': snippet.get('title', ''),
+            'video_id': video['id'],
+            'url': f"https://www.youtube.com/watch?v={video['id']}",
+            'view_count': view_count,
+            'like_count': like_count,
+            'engagement_rate': round((like_count / view_count * 100), 2) if view_count > 0 else 0,
+            'duration': {
+                'seconds': duration_sec,
+                'formatted': _format_seconds(duration_sec)
+            },
+            'days_since_publish': days_since_publish,
+            'views_per_day': round(view_count / max(days_since_publish, 1)),
+            'tags': snippet.get('tags', []),
+            'description': snippet.get('description', ''),
+            'channel_title': snippet.get('channelTitle', ''),
+            'category_id': snippet.get('categoryId', 'N/A'),
+            'publish_date': publish_date.date().isoformat(),
+            'region': self.REGIONS[region_code]
+        }
+        
+        video_data['hooks'] = self._analyze_segments(
+            video_data, 
+            search_terms,
+            use_captions=use_captions,
+            caption_future=caption_future
+        )
+        return video_data
+
+    def analyze_videos(self, query: str, max_results: int = 5, 
+                      duration_type: str = 'any',
+                      order_by: str = 'viewCount',
+                      region_code: str = 'US',
+                      days_ago: int = 5,
+                      use_captions: bool = False,
+                      channel: str = '',
+                      prefetch_captions: bool = False) -> List[Dict]:
+        """Search and analyze videos with enhanced filters.
+        
+        With a channel id ('UC...'), the channel's recent uploads are
+        analyzed instead of running a keyword search; query then only
+        drives segment scoring. prefetch_captions warms the transcript
+        cache in the background when captions are off, for apps that let
+        the user turn them on afterwards.
+        """
+        try:
+            st.text("🔍 Searching videos...")
+            if use_captions and self.quota.remaining < 75 * max_results:
+                st.warning("⚠️ Not enough quota left today for caption analysis; skipping it")
+                use_captions = False
+            
+            if channel:
+                video_ids = _channel_video_ids(
+                    self.youtube, self.quota, self.api_key, channel, max_results, days_ago
+                )
+            else:
+                video_ids = _search_video_ids(
+                    self.youtube, self.quota, self.api_key, query, max_results, duration_type,
+                    order_by, region_code, days_ago
+                )
+
+            if not video_ids:
+                return []
+            
+            # Per-call state: concurrent sessions share this analyzer
+            caption_futures = {}
+            if use_captions:
+                # Fire all transcript requests now so they overlap the details call
+                # (reusing any background prefetch still in flight)
+                executor = ThreadPoolExecutor(max_workers=min(16, len(video_ids)))
+                with self._prefetch_lock:
+                    prefetching = dict(self._prefetching)
+                caption_futures = {
+                    video_id: prefetching.get(video_id) or executor.submit(_fetch_transcript, video_id)
+                    for video_id in video_ids
+                }
+                executor.shutdown(wait=False)
+            elif prefetch_captions:
+                self._prefetch_captions(video_ids)
+            
+            st.text("📋 Getting video details...")
+            items = _video_items(self.youtube, self.quota, self.api_key, video_ids)
+
+            analyzed_videos = []
+            query_keywords = [word.strip() for word in query.lower().split() if len(word.strip()) > 2]
+            search_terms = frozenset(query_keywords)
+            
+            progress = st.progress(0.0, text="🔎 Analyzing videos...")
+            now_utc = datetime.now(timezone.utc)
+            # Videos are independent, so analyze them concurrently; Streamlit
+            # calls are not thread-safe, so only this (main) thread touches the UI
+            with ThreadPoolExecutor(max_workers=max(1, len(items))) as executor:
+                futures = [
+                    executor.submit(self._process_video, video, search_terms,
+                                    region_code, now_utc, use_captions,
+                                    caption_futures.get(video.get('id')))
+                    for video in items
+                ]
+                for done, _ in enumerate(as_completed(futures), 1):
+                    progress.progress(done / len(futures),
+                                      text=f"🔎 Analyzed {done} of {len(futures)} videos")
+            
+            errors = []
+            for video, future in zip(items, futures):
+                try:
+                    video_data = future.result()
+                except Exception as e:
+                    # Unparseable duration or date, or a failure in third-party
+                    # enrichment: drop this video only and report it below
+                    logger.warning("Could not process video %s", video.get('id', 'unknown'), exc_info=True)
+                    errors.append(f"{video.get('id', 'unknown')} ({e})")
+                    continue
+                if video_data is None:
+                    errors.append(f"{video.get('id', 'unknown')} (incomplete data)")
+                else:
+                    analyzed_videos.append(video_data)
+            
+            if errors:
+                shown = ', '.join(errors[:3])
+                more = f" and {len(errors) - 3} more" if len(errors) > 3 else ""
+                st.warning(f"⚠️ {len(errors)} videos could not be processed: {shown}{more}")
+
+            st.text("✅ Analysis complete!")
+            return analyzed_videos
+            
+        except Exception as e:
+            st.error(f"Error in video analysis: {str(e)}")
+            return []
+
+# Card background per integer relevance percentage (0-100)
+_COLOR_TABLE = [f"rgba(0, {min(255, int(r * 2.55))}, 0, 0.2)" for r in range(101)]
+_TRANSCRIPT_COLOR = "rgba(0, 128, 255, 0.2)"
+_SEGMENT_CARD = string.Template(
+    '<div style="padding: 10px; background-color: $color; border-radius: 5px; margin: 5px 0;">'
+    '<strong>$title</strong><br>'
+    'Time: $timestamp | Relevance: $relevance%<br>'
+    '<a href="$url" target="_blank">Watch Segment</a>'
+    '</div>'
+)
+
+# Segment group headings, in display order (transcript matches first)
+_SEGMENT_GROUPS = {
+    'transcript_match': '📝 In Video Mentions',
+    'keyword_match': '🔍 Keyword Matches',
+    'engagement': '🔥 High Engagement',
+    'intro': '👋 Introduction'
+}
+
+def display_video_segments(video: Dict):
+    """Display video segments with enhanced information."""
+    st.write("**🎯 Relevant Segments:**")
+    
+    # Partition hooks by type in one pass
+    groups = {segment_type: [] for segment_type in _SEGMENT_GROUPS}
+    for hook in video['hooks']:
+        bucket = groups.get(hook.segment_type)
+        if bucket is not None:
+            bucket.append(hook)
+    
+    # All cards are rendered with one st.markdown call instead of one per segment.
+    parts = []
+    for segment_type, heading in _SEGMENT_GROUPS.items():
+        segments = groups[segment_type]
+        if segments:
+            parts.append(f"<p><strong>{heading}:</strong></p>")
+            # Enhanced color for transcript matches
+            fixed_color = _TRANSCRIPT_COLOR if segment_type == 'transcript_match' else None
+            for hook in segments:
+                relevance = hook.relevance_score * 100
+                parts.append(_SEGMENT_CARD.substitute(
+                    color=fixed_color or _COLOR_TABLE[max(0, min(int(relevance), 100))],
+                    title=hook.title or 'Segment',
+                    timestamp=_format_seconds(hook.start_time),
+                    relevance=f"{relevance:.1f}",
+                    url=hook.url
+                ))
+    
+    if parts:
+        st.markdown("\n".join(parts), unsafe_allow_html=True)
+
+
+def _export_default(obj):
+    """JSON fallback for values the encoders do not handle themselves."""
+    return obj.to_dict() if isinstance(obj, Hook) else str(obj)
+
+def export_json(videos: List[Dict]) -> bytes:
+    """Serialize analysis results as JSON, using orjson when it is installed."""
+    if orjson is not None:
+        # Hooks go through to_dict rather than orjson's native dataclass
+        # support, which would also write sort_key
+        return orjson.dumps(videos, default=_export_default,
+                            option=orjson.OPT_NON_STR_KEYS | orjson.OPT_PASSTHROUGH_DATACLASS)
+    return json.dumps(videos, default=_export_default, separators=(',', ':')).encode('utf-8')
+
+@st.cache_resource(show_spinner=False)
+def get_analyzer(api_key: str) -> YouTubeLiteAnalyzer:
+    """Build the analyzer once per API key instead of on every rerun."""
+    return YouTubeLiteAnalyzer(api_key)
@@ -0,0 +1,77 @@
+import json
+import os
+import sqlite3
+import threading
+import time
+from typing import Dict, Optional, Tuple
+
+# Kept in the user cache directory so it survives restarts and stays out of the source tree
+DEFAULT_PATH = os.path.join(
+    os.environ.get('XDG_CACHE_HOME') or os.path.join(os.path.expanduser('~'), '.cache'),
+    'youtube_analyzer', 'responses.sqlite3'
+)
+
+class ResponseCache:
+    """SQLite store of API responses with their ETags, shared by all sessions.
+    
+    Responses older than max_age are stale but kept for ETag revalidation;
+    past max_rows, the least recently stored ones are evicted.
+    """
+
+    def __init__(self, path: str = DEFAULT_PATH, max_age: int = 6 * 3600, max_rows: int = 2000):
+        self.max_age = max_age
+        self.max_rows = max_rows
+        self._lock = threading.Lock()
+        os.makedirs(os.path.dirname(path) or '.', exist_ok=True)
+        # Streamlit sessions run on separate threads; access is serialized by the lock
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS response ("
+            "key TEXT PRIMARY KEY, etag TEXT, json TEXT, inserted_at INTEGER)"
+        )
+        self._conn.execute(
+            "CREATE INDEX IF NOT EXISTS response_inserted_at ON response (inserted_at)"
+        )
+        self._conn.commit()
+
+    def get(self, key: str) -> Optional[Tuple[str, Dict, bool]]:
+        """Return (etag, payload, is_fresh) for key, or None if never stored."""
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT etag, json, inserted_at FROM response WHERE key = ?", (key,)
+            ).fetchone()
+        if row is None:
+            return None
+        etag, payload, inserted_at = row
+        return etag, json.loads(payload), time.time() - inserted_at < self.max_age
+
+    def put(self, key: str, etag: str, payload: Dict):
+        """Store a response, replacing any previous one for key, and evict the oldest past max_rows."""
+        with self._lock:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO response VALUES (?, ?, ?, ?)",
+                (key, etag, json.dumps(payload, separators=(',', ':')), int(time.time()))
+            )
+            # Everything stored before the max_rows-th newest row goes
+            self._conn.execute(
+                "DELETE FROM response WHERE inserted_at < ("
+                "SELECT inserted_at FROM response ORDER BY inserted_at DESC LIMIT 1 OFFSET ?)",
+                (self.max_rows - 1,)
+            )
+            self._conn.commit()
+
+    def touch(self, key: str):
+        """Mark a stored response as fresh again (after a 304 Not Modified)."""
+        with self._lock:
+            self._conn.execute(
+                "UPDATE response SET inserted_at = ? WHERE key = ?", (int(time.time()), key)
+            )
+            self._conn.commit()
+
+    def clear(self):
+        """Drop every stored response."""
+        with self._lock:
+            self._conn.execute("DELETE FROM response")
+            self._conn.commit()
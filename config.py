@@ -1,28 +1,34 @@
 import os
 from googleapiclient.discovery import build
+from googleapiclient.errors import HttpError
+import httplib2
 import streamlit as st
 
+@st.cache_data(ttl=3600)
 def get_api_key() -> str:
     """Get API key from various sources."""
     # Try Streamlit secrets first
     try:
         return st.secrets["youtube_api_key"]
-    except:
+    except (KeyError, FileNotFoundError):
         # Fall back to environment variable
         return os.getenv("YOUTUBE_API_KEY", "")
 
+@st.cache_data(ttl=600, show_spinner=False)
 def validate_api_key(api_key: str) -> bool:
     """Validate YouTube API key."""
     if not api_key:
         return False
         
     try:
-        youtube = build('youtube', 'v3', developerKey=api_key)
+        youtube = build('youtube', 'v3', developerKey=api_key,
+                        static_discovery=True, cache_discovery=False)
         request = youtube.search().list(
             part="id",
             maxResults=1
         )
         request.execute()
         return True
-    except:
+    except (HttpError, httplib2.HttpLib2Error, OSError):
+        # Rejected key, or a transport failure (timeout, unreachable host)
         return False
@@ -1,25 +1,132 @@
 import streamlit as st
 import os
 from googleapiclient.discovery import build
-from datetime import datetime, timedelta
-import isodate
-import pytz
-from typing import List, Dict
+from datetime import datetime, timedelta, timezone
+from typing import List, Dict, Optional
 import re
+import heapq
 from collections import Counter
+from operator import itemgetter
+from concurrent.futures import ThreadPoolExecutor
 import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+import json
+from analyzer import (
+    QuotaTracker, _build_request, _duration_seconds, _execute, _format_seconds,
+    _keyword_matcher, _response_cache, clear_response_cache, export_json
+)
 
 def get_api_key() -> str:
     """Read API key from Streamlit secrets or environment."""
     try:
         return st.secrets["youtube_api_key"]
-    except:
+    except (KeyError, FileNotFoundError):
         return os.getenv("YOUTUBE_API_KEY", "")
 
+# Result card markup, filled in with str.format per segment
+_SEGMENT_CARD = (
+    '<div style="padding: 10px; background-color: {color}; border-radius: 5px; margin: 5px 0;">'
+    '<strong>{title}</strong><br>'
+    'Time: {timestamp} | Relevance: {relevance:.1f}%<br>'
+    '<a href="{url}" target="_blank">🎥 Watch Segment</a>'
+    '</div>'
+)
+_REPLAYED_CARD = (
+    '<div style="padding: 10px; background-color: rgba(0, 0, 255, 0.2); border-radius: 5px; margin: 5px 0;">'
+    '<strong>Most Replayed Segment</strong><br>'
+    'Time: {start} - {end}<br>'
+    'Intensity: {intensity:.1f}%<br>'
+    '<a href="{url}" target="_blank">🎥 Watch Segment</a>'
+    '</div>'
+)
+
+@st.cache_resource(show_spinner=False)
+def _watch_page_session() -> requests.Session:
+    """Session for watch-page fetches, shared by all worker threads.
+    
+    A connection only returns to the pool when its page was read to the end;
+    _fetch_heatmap usually stops early, so most fetches open a new one.
+    """
+    session = requests.Session()
+    session.headers.update({'User-Agent': 'Mozilla/5.0', 'Accept-Language': 'en-US'})
+    # One pooled connection per worker; retry brief connection failures
+    adapter = HTTPAdapter(pool_connections=10, pool_maxsize=10,
+                          max_retries=Retry(total=2, backoff_factor=0.3))
+    session.mount('https://', adapter)
+    return session
+
+@st.cache_data(ttl=3600, show_spinner=False)
+def _fetch_heatmap(video_id: str) -> Optional[str]:
+    """Raw heatmap text from a video's watch page, cached for an hour.
+    
+    Returns None when the page has no heatmap. Request errors are raised and
+    therefore not cached; _fetch_heatmap.clear() drops cached pages.
+    """
+    # Stream the video's webpage and stop reading once the heatmap has arrived.
+    # Leaving the with block early closes the socket instead of pooling it:
+    # a new TLS handshake per video is cheaper than draining the rest of a
+    # watch page that is mostly scripts
+    url = f"https://www.youtube.com/watch?v={video_id}"
+    with _watch_page_session().get(url, timeout=(3, 10), stream=True) as response:
+        response.raise_for_status()
+        if response.encoding is None:
+            response.encoding = 'utf-8'
+
+        page = ''
+        start = -1
+        for chunk in response.iter_content(65536, decode_unicode=True):
+            # Rescan a few characters back in case the marker straddles chunks
+            scan_from = max(len(page) - len('heatmap='), 0) if start == -1 else len(page)
+            page += chunk
+            if start == -1:
+                marker = page.find('heatmap=', scan_from)
+                if marker == -1:
+                    continue
+                start = marker + len('heatmap=')
+                scan_from = start
+            end = page.find(';', scan_from)
+            if end != -1:
+                return page[start:end]
+
+    # No heatmap at all, or one running to the end of the page
+    return page[start:] if start != -1 else None
+
 class YouTubeLiteAnalyzer:
+    # Partial responses: only what _process_video and _get_engagement_metrics read
+    VIDEO_FIELDS = (
+        'etag,items(id,snippet(title,description,channelTitle,publishedAt,tags,categoryId),'
+        'statistics(viewCount,likeCount,commentCount),contentDetails(duration))'
+    )
+    COMMENT_FIELDS = 'etag,nextPageToken,items/snippet/topLevelComment/snippet/textDisplay'
+    # Further comment pages (1 unit each) are read only while timestamp mentions are scarce
+    MAX_COMMENT_PAGES = 3
+    TIMESTAMP_HITS_WANTED = 50
+    # Comment timestamps this many seconds apart count as the same moment
+    TIMESTAMP_BUCKET = 5
+
+    # Comment timestamps: H:MM:SS / M:SS, or 1h2m3s style with at least two
+    # units, since a lone "4m views" or "10s of people" is not a time
+    _TIMESTAMP_RE = re.compile(
+        r'\b(?:(\d+):)?(\d+):(\d{2})\b'
+        r'|\b(?=\d+[hm]\d+[ms])(?:(\d+)h)?(?:(\d+)m)?(?:(\d+)s)?(?<=[hms])\b'
+    )
+    # Comments without any digit cannot hold a timestamp and skip the regex
+    _DIGITS = frozenset('0123456789')
+
+    # Description chapter lines: "H:MM:SS Title" or "M:SS Title"
+    _CHAPTER_RE = re.compile(r'^[ \t]*(?:(\d+):)?(\d{1,2}):(\d{2})[ \t]+(.+?)[ \t\r]*$', re.MULTILINE)
+
     def __init__(self, api_key: str):
         """Initialize YouTube API client with enhanced configuration."""
-        self.youtube = build('youtube', 'v3', developerKey=api_key)
+        self.api_key = api_key
+        # Use the discovery document bundled with googleapiclient (no HTTP fetch);
+        # requests run on the calling thread's own httplib2 client
+        self.youtube = build('youtube', 'v3', developerKey=api_key,
+                             requestBuilder=_build_request,
+                             static_discovery=True, cache_discovery=False)
+        self.cache = _response_cache()
+        self.quota = QuotaTracker()
         self.regions = {
             'US': 'United States',
             'GB': 'United Kingdom',
@@ -46,71 +153,157 @@ class YouTubeLiteAnalyzer:
             'favorite', 'best part', 'dont miss', "don't miss",
             'watch this', 'check out', 'look at'
         ]
+        # All indicators are found in one pass over a title, with the same
+        # matcher (automaton or overlap-aware regex) that scores keywords
+        self._find_indicators = _keyword_matcher(frozenset(self.engagement_indicators))
 
     def calculate_quota_cost(self, max_results: int) -> dict:
         """Calculate estimated API quota usage with comment analysis."""
         search_cost = 100
         video_details_cost = 1
-        comments_cost = 1
-        captions_cost = 50  # Cost for caption retrieval
+        comments_cost = self.MAX_COMMENT_PAGES  # At most, per video
         
         total_video_costs = video_details_cost * max_results
         total_comments_costs = comments_cost * max_results
-        total_captions_costs = captions_cost * max_results
         
-        total_cost = search_cost + total_video_costs + total_comments_costs + total_captions_costs
+        total_cost = search_cost + total_video_costs + total_comments_costs
         
         return {
             'search_cost': search_cost,
             'video_details_cost': total_video_costs,
             'comments_cost': total_comments_costs,
-            'captions_cost': total_captions_costs,
             'total_cost': total_cost,
-            'daily_limit': 10000,
-            'remaining_after': 10000 - total_cost
+            'daily_limit': self.quota.daily_limit,
+            'remaining': self.quota.remaining,
+            'remaining_after': self.quota.remaining - total_cost
         }
 
-    def _get_engagement_metrics(self, video_id: str) -> List[Dict]:
-        """Get engagement metrics for video segments from comments."""
-        try:
-            engagement_data = []
-            
-            # Get comments
-            comments_response = self.youtube.commentThreads().list(
+    def _cached_execute(self, key: str, request, cost: int) -> Dict:
+        """Execute an API request, reusing a stored response under 6 hours old.
+        
+        Misses go through analyzer._execute: charged to this key's quota,
+        retried on rate limits and capped in concurrency like v2's calls.
+        """
+        cached = self.cache.get(key)
+        if cached is not None and cached[2]:
+            return cached[1]
+        response = _execute(request, self.quota, cost)
+        self.cache.put(key, response.get('etag', ''), response)
+        return response
+
+    def _fetch_comment_threads(self, video_ids: List[str]) -> Dict[str, Dict]:
+        """Fetch comment threads for all videos in batched HTTP requests.
+        
+        Videos whose comments are already cached on disk are left out of the batch.
+        Each round fetches the next page for every video that still has fewer
+        than TIMESTAMP_HITS_WANTED timestamp mentions, up to MAX_COMMENT_PAGES.
+        """
+        responses = {}
+        missing = []
+        for video_id in video_ids:
+            cached = self.cache.get(f"comments:{video_id}")
+            if cached is not None and cached[2]:
+                responses[video_id] = cached[1]
+            else:
+                missing.append(video_id)
+        if not missing:
+            return responses
+
+        pending = {
+            video_id: self.youtube.commentThreads().list(
                 part='snippet',
                 videoId=video_id,
-                maxResults=500,
-                order='relevance'
-            ).execute()
+                maxResults=100,
+                order='relevance',
+                fields=self.COMMENT_FIELDS
+            )
+            for video_id in missing
+        }
+        for _ in range(self.MAX_COMMENT_PAGES):
+            pages = {}
 
-            # Process timestamps from comments
-            timestamp_pattern = r'(\d+):(\d+)(?::(\d+))?'  # Matches MM:SS or HH:MM:SS
-            timestamp_counts = Counter()
-            
-            for item in comments_response.get('items', []):
-                comment = item['snippet']['topLevelComment']['snippet']['textDisplay'].lower()
-                matches = re.finditer(timestamp_pattern, comment)
-                
-                for match in matches:
-                    try:
-                        # Extract hours, minutes, and seconds
-                        hours = int(match.group(1)) if match.group(1) else 0
-                        minutes = int(match.group(2))
-                        seconds = int(match.group(3)) if match.group(3) else 0
-                        
-                        # Calculate total seconds
-                        total_seconds = (hours * 3600) + (minutes * 60) + seconds
-                        
-                        # Only add if the timestamp is valid
-                        if total_seconds > 0:
-                            timestamp_counts[total_seconds] += 1
-                    except:
-                        continue
+            def store_page(request_id, response, exception):
+                if exception is not None:
+                    st.warning(f"Error getting comments for video {request_id}: {str(exception)}")
+                    return
+                pages[request_id] = response
+
+            batch = self.youtube.new_batch_http_request(callback=store_page)
+            for video_id, request in pending.items():
+                batch.add(request, request_id=video_id)
+            # One unit per comment page in the batch
+            _execute(batch, self.quota, len(pending))
+
+            next_pending = {}
+            for video_id, page in pages.items():
+                if video_id in responses:
+                    responses[video_id]['items'].extend(page.get('items', []))
+                else:
+                    responses[video_id] = page
+                if (page.get('nextPageToken') and
+                        sum(self._timestamp_counts(responses[video_id]).values()) < self.TIMESTAMP_HITS_WANTED):
+                    next_pending[video_id] = self.youtube.commentThreads().list_next(
+                        pending[video_id], page
+                    )
+            pending = next_pending
+            if not pending:
+                break
+
+        for video_id in missing:
+            if video_id in responses:
+                response = responses[video_id]
+                self.cache.put(f"comments:{video_id}", response.get('etag', ''), response)
+        return responses
+
+    @staticmethod
+    def _timestamp_seconds(groups) -> int:
+        """Seconds for one _TIMESTAMP_RE match tuple (0 means no usable timestamp)."""
+        hours, minutes, seconds, unit_h, unit_m, unit_s = groups
+        if minutes:
+            return int(hours or 0) * 3600 + int(minutes) * 60 + int(seconds)
+        return int(unit_h or 0) * 3600 + int(unit_m or 0) * 60 + int(unit_s or 0)
+
+    def _timestamp_counts(self, comments_response: Dict) -> Counter:
+        """Count the timestamps mentioned across a comments response.
+        
+        Mentions are grouped from the earliest one up: a timestamp less than
+        TIMESTAMP_BUCKET seconds after the first of its group joins it, so
+        "2:34" and "2:35" add up as one moment, keyed by 154.
+        """
+        # One regex sweep over the comments that contain a digit at all
+        # (most don't); Counter tallies the seconds in C
+        comments_text = '\n'.join(
+            text for text in (
+                item['snippet']['topLevelComment']['snippet']['textDisplay']
+                for item in comments_response.get('items', [])
+            )
+            if not self._DIGITS.isdisjoint(text)
+        ).lower()
+        counts = Counter(
+            filter(None, map(self._timestamp_seconds, self._TIMESTAMP_RE.findall(comments_text)))
+        )
+        # Merge over the distinct seconds only, which are few
+        bucket = self.TIMESTAMP_BUCKET
+        grouped = Counter()
+        group_start = None
+        for seconds in sorted(counts):
+            if group_start is None or seconds - group_start >= bucket:
+                group_start = seconds
+            grouped[group_start] += counts[seconds]
+        return grouped
+
+    def _get_engagement_metrics(self, comments_response: Dict, warnings: List[str]) -> List[Dict]:
+        """Get engagement metrics for video segments from a prefetched comments response."""
+        try:
+            engagement_data = []
+            timestamp_counts = self._timestamp_counts(comments_response)
             
             # Convert timestamp counts to engagement data
             if timestamp_counts:
-                max_count = max(timestamp_counts.values())
-                for timestamp, count in timestamp_counts.most_common(10):
+                top_timestamps = timestamp_counts.most_common(10)
+                # most_common is sorted, so the first count is the maximum
+                max_count = top_timestamps[0][1]
+                for timestamp, count in top_timestamps:
                     engagement_data.append({
                         'start_time': timestamp,
                         'frequency': count,
@@ -121,124 +314,116 @@ class YouTubeLiteAnalyzer:
             return engagement_data
             
         except Exception as e:
-            st.warning(f"Error getting engagement metrics: {str(e)}")
+            warnings.append(f"Error getting engagement metrics: {str(e)}")
             return []
 
-    def _get_most_replayed_segments(self, video_id: str) -> List[Dict]:
-        """Fetch most replayed segments for a YouTube video."""
+    def _get_most_replayed_segments(self, video_id: str, warnings: List[str]) -> List[Dict]:
+        """Fetch most replayed segments for a YouTube video.
+        
+        Runs on a worker thread, so problems are appended to warnings for the
+        caller to display instead of being shown directly.
+        """
         try:
-            # Fetch the video's webpage
-            url = f"https://www.youtube.com/watch?v={video_id}"
-            response = requests.get(url)
-            response.raise_for_status()
-
-            # Log the raw HTML for debugging
-            with open(f"youtube_page_{video_id}.html", "w", encoding="utf-8") as f:
-                f.write(response.text)
-
-            # Check if heatmap data exists in the HTML
-            if 'heatmap=' not in response.text:
-                st.warning(f"No heatmap data found for video {video_id}.")
-                return []
-
-            # Extract heatmap data
-            heatmap_data = response.text.split('heatmap=')[1].split(';')[0]
+            heatmap_data = _fetch_heatmap(video_id)
+        except Exception as e:
+            warnings.append(f"Error fetching most replayed segments: {str(e)}")
+            return []
 
-            # Safely evaluate the heatmap data
-            try:
-                heatmap_data = eval(heatmap_data)  # Convert string to dictionary
-            except Exception as e:
-                st.warning(f"Error parsing heatmap data for video {video_id}: {str(e)}")
-                return []
+        if heatmap_data is None:
+            warnings.append(f"No heatmap data found for video {video_id}.")
+            return []
 
-            # Process heatmap data
-            segments = []
-            for segment in heatmap_data:
-                segments.append({
+        # Parse as JSON; page content is untrusted, so it is never evaluated
+        try:
+            segments = [
+                {
                     'start_time': segment['start'],
                     'end_time': segment['end'],
+                    'start_time_fmt': _format_seconds(segment['start']),
+                    'end_time_fmt': _format_seconds(segment['end']),
                     'intensity': segment['intensity']
-                })
-
-            return segments
-        except Exception as e:
-            st.warning(f"Error fetching most replayed segments: {str(e)}")
+                }
+                for segment in json.loads(heatmap_data)
+            ]
+        except (ValueError, KeyError, TypeError) as e:
+            warnings.append(f"Error parsing heatmap data for video {video_id}: {str(e)}")
             return []
 
-    def _analyze_segments(self, video_data: Dict, query_keywords: List[str]) -> Dict:
-        """Analyze segments using comments, description, and most replayed data."""
+        return segments
+
+    def _count_engagement_indicators(self, text: str) -> int:
+        """Number of distinct engagement indicators appearing in text."""
+        return len(self._find_indicators(text))
+
+    def _analyze_segments(self, video_data: Dict, search_terms: frozenset,
+                          comments_response: Dict, warnings: List[str]) -> Dict:
+        """Analyze segments using comments, description, and most replayed data.
+        
+        search_terms holds the lower-cased query keywords, built once per search.
+        """
         hooks = {
             'comments': [],
             'description': [],
             'most_replayed': []
         }
-        search_terms = set(word.lower() for word in query_keywords)
+        n_terms = len(search_terms)
+        engagement_weight = 0.3 / len(self.engagement_indicators)
         
         # Get engagement-based segments from comments
-        engagement_segments = self._get_engagement_metrics(video_data['video_id'])
+        engagement_segments = self._get_engagement_metrics(comments_response, warnings)
         for segment in engagement_segments:
             # Ensure the timestamp does not exceed the video's duration
             if segment['start_time'] <= video_data['duration']['seconds']:
                 hooks['comments'].append({
                     'start_time': segment['start_time'],
+                    'start_time_fmt': _format_seconds(segment['start_time']),
                     'duration': 5,
                     'url': f"{video_data['url']}&t={int(segment['start_time'])}s",
                     'relevance_score': segment['relevance_score'],
                     'segment_type': 'user_engagement',
-                    'title': f"Popular Segment (mentioned {segment['frequency']} times)"
+                    'title': f"Popular Segment (mentioned {segment['frequency']} times within {self.TIMESTAMP_BUCKET}s)"
                 })
         
-        # Parse description for chapters
-        description_lines = video_data.get('description', '').split('\n')
+        # Parse description for chapters in one regex scan
+        max_seconds = video_data['duration']['seconds']
         chapters = []
         
-        for line in description_lines:
-            if ':' in line and any(char.isdigit() for char in line):
-                try:
-                    parts = line.split(' ', 1)
-                    if len(parts) < 2:
-                        continue
-                        
-                    time_str, title = parts
-                    if ':' not in time_str:
-                        continue
-                    
-                    time_parts = time_str.split(':')
-                    seconds = sum(x * int(t) for x, t in zip([3600, 60, 1], time_parts[-3:]))
-                    
-                    # Ensure the timestamp does not exceed the video's duration
-                    if seconds >= video_data['duration']['seconds']:
-                        continue
-                    
-                    # Relevance scoring
-                    title_lower = title.lower()
-                    title_words = set(title_lower.split())
-                    matching_words = search_terms.intersection(title_words)
-                    relevance_score = len(matching_words) / len(search_terms) if search_terms else 0.5
-                    
-                    # Engagement detection
-                    engagement_score = sum(1 for indicator in self.engagement_indicators if indicator in title_lower)
-                    engagement_boost = (engagement_score / len(self.engagement_indicators)) * 0.3
-                    
-                    # Combined scoring
-                    final_score = relevance_score + engagement_boost
-                    
-                    chapters.append({
-                        'start_time': seconds,
-                        'title': title.strip(),
-                        'relevance_score': final_score,
-                        'segment_type': 'keyword_match',
-                        'duration': 5,
-                        'url': f"{video_data['url']}&t={int(seconds)}s"
-                    })
-                    
-                except Exception as e:
-                    continue
+        for match in self._CHAPTER_RE.finditer(video_data.get('description', '')):
+            hours, minutes, secs, title = match.groups()
+            seconds = int(hours or 0) * 3600 + int(minutes) * 60 + int(secs)
+            
+            # Ensure the timestamp does not exceed the video's duration
+            if seconds >= max_seconds:
+                continue
+            
+            # Relevance scoring
+            title_lower = title.lower()
+            matching_words = search_terms.intersection(title_lower.split())
+            relevance_score = len(matching_words) / n_terms if n_terms else 0.5
+            
+            # Engagement detection
+            engagement_score = self._count_engagement_indicators(title_lower)
+            engagement_boost = engagement_score * engagement_weight
+            
+            # Combined scoring
+            final_score = relevance_score + engagement_boost
+            
+            chapters.append({
+                'start_time': seconds,
+                'title': title,
+                'relevance_score': final_score,
+                'segment_type': 'keyword_match',
+                'duration': 5,
+                'url': f"{video_data['url']}&t={seconds}s"
+            })
         
-        hooks['description'] = sorted(chapters, key=lambda x: x['relevance_score'], reverse=True)[:5]
+        hooks['description'] = heapq.nlargest(5, chapters, key=itemgetter('relevance_score'))
+        # Times are formatted once here, not on every rerun that displays them
+        for chapter in hooks['description']:
+            chapter['start_time_fmt'] = _format_seconds(chapter['start_time'])
         
         # Get most replayed segments
-        most_replayed_segments = self._get_most_replayed_segments(video_data['video_id'])
+        most_replayed_segments = self._get_most_replayed_segments(video_data['video_id'], warnings)
         hooks['most_replayed'] = most_replayed_segments
         
         return hooks
@@ -248,142 +433,189 @@ class YouTubeLiteAnalyzer:
                     order_by: str = 'viewCount',
                     region_code: str = 'US',
                     days_ago: int = 5) -> List[Dict]:
-        """Enhanced video analysis with engagement metrics."""
+        """Enhanced video analysis with engagement metrics.
+        
+        Results are cached for 10 minutes per parameter set; failures are not.
+        """
         try:
-            st.text("🔍 Searching videos...")
-            past_date = (datetime.utcnow() - timedelta(days=days_ago)).strftime('%Y-%m-%dT%H:%M:%SZ')
-            
-            search_params = {
-                'q': query,
-                'type': 'video',
-                'part': 'id',
-                'maxResults': max_results,
-                'order': order_by,
-                'regionCode': region_code,
-                'publishedAfter': past_date
-            }
-            
-            if duration_type != 'any':
-                search_params['videoDuration'] = self.duration_ranges[duration_type]
+            return _run_analysis(self.api_key, query, max_results, duration_type,
+                                 order_by, region_code, days_ago)
+        except Exception as e:
+            st.error(f"Error in video analysis: {str(e)}")
+            return []
 
-            search_response = self.youtube.search().list(**search_params).execute()
+    def _analyze_videos_uncached(self, query: str, max_results: int, duration_type: str,
+                                 order_by: str, region_code: str, days_ago: int) -> List[Dict]:
+        """Search, fetch details and comments, and analyze each video."""
+        st.text("🔍 Searching videos...")
+        # One clock reading for the search window and every video's age
+        now_utc = datetime.now(timezone.utc)
+        # Whole hours keep the cache key stable across reruns
+        past_date = (now_utc - timedelta(days=days_ago)).strftime('%Y-%m-%dT%H:00:00Z')
 
-            if not search_response.get('items'):
-                return []
+        search_params = {
+            'q': query,
+            'type': 'video',
+            'part': 'id',
+            'maxResults': max_results,
+            'order': order_by,
+            'regionCode': region_code,
+            'publishedAfter': past_date
+        }
 
-            video_ids = [item['id']['videoId'] for item in search_response['items']]
-            
-            st.text("📋 Getting video details and engagement metrics...")
-            videos_response = self.youtube.videos().list(
-                part='snippet,statistics,contentDetails',
-                id=','.join(video_ids)
-            ).execute()
+        if duration_type != 'any':
+            search_params['videoDuration'] = self.duration_ranges[duration_type]
 
-            analyzed_videos = []
-            query_keywords = [word.strip() for word in query.lower().split() if len(word.strip()) > 2]
-            
-            for video in videos_response['items']:
-                try:
-                    duration_str = video['contentDetails']['duration']
-                    duration_sec = isodate.parse_duration(duration_str).total_seconds()
-                    
-                    view_count = int(video['statistics'].get('viewCount', 0))
-                    like_count = int(video['statistics'].get('likeCount', 0))
-                    comment_count = int(video['statistics'].get('commentCount', 0))
-                    
-                    publish_date = datetime.strptime(
-                        video['snippet']['publishedAt'], 
-                        '%Y-%m-%dT%H:%M:%SZ'
-                    ).replace(tzinfo=pytz.UTC)
-                    
-                    days_since_publish = (datetime.now(pytz.UTC) - publish_date).days
-                    
-                    video_data = {
-                        'title': video['snippet']['title'],
-                        'video_id': video['id'],
-                        'url': f"https://www.youtube.com/watch?v={video['id']}",
-                        'view_count': view_count,
-                        'like_count': like_count,
-                        'comment_count': comment_count,
-                        'engagement_rate': round((like_count / view_count * 100), 2) if view_count > 0 else 0,
-                        'duration': {
-                            'seconds': duration_sec,
-                            'formatted': str(timedelta(seconds=int(duration_sec)))
-                        },
-                        'days_since_publish': days_since_publish,
-                        'views_per_day': round(view_count / max(days_since_publish, 1)),
-                        'tags': video['snippet'].get('tags', []),
-                        'description': video['snippet']['description'],
-                        'channel_title': video['snippet']['channelTitle'],
-                        'category_id': video['snippet'].get('categoryId', 'N/A'),
-                        'publish_date': publish_date.strftime('%Y-%m-%d'),
-                        'region': self.regions[region_code]
-                    }
-                    
-                    # Add enhanced segment analysis
-                    video_data['hooks'] = self._analyze_segments(video_data, query_keywords)
-                    analyzed_videos.append(video_data)
-                    
-                except Exception as e:
-                    st.warning(f"Error processing video {video.get('id', 'unknown')}: {str(e)}")
-                    continue
+        search_response = self._cached_execute(
+            'search:' + json.dumps(search_params, sort_keys=True),
+            self.youtube.search().list(**search_params),
+            100
+        )
 
-            st.text("✅ Analysis complete!")
-            return analyzed_videos
-            
-        except Exception as e:
-            st.error(f"Error in video analysis: {str(e)}")
+        if not search_response.get('items'):
             return []
 
+        video_ids = [item['id']['videoId'] for item in search_response['items']]
+
+        st.text("📋 Getting video details and engagement metrics...")
+        videos_response = self._cached_execute(
+            'videos:' + ','.join(video_ids),
+            self.youtube.videos().list(
+                part='snippet,statistics,contentDetails',
+                id=','.join(video_ids),
+                fields=self.VIDEO_FIELDS
+            ),
+            1
+        )
+
+        # All comment threads are fetched up front in one round-trip
+        comments_responses = self._fetch_comment_threads(video_ids)
+
+        search_terms = frozenset(word for word in query.lower().split() if len(word) > 2)
+        warnings = []
+
+        def process(video: Dict) -> Optional[Dict]:
+            try:
+                return self._process_video(
+                    video, search_terms, region_code, now_utc,
+                    comments_responses.get(video['id'], {}), warnings
+                )
+            except Exception as e:
+                warnings.append(f"Error processing video {video.get('id', 'unknown')}: {str(e)}")
+                return None
+
+        # Each video waits on its own watch-page fetch, so run them side by side.
+        # Workers never touch st directly; their warnings are shown after the join
+        with ThreadPoolExecutor(max_workers=8) as executor:
+            results = list(executor.map(process, videos_response['items']))
+        analyzed_videos = [video_data for video_data in results if video_data is not None]
+        for message in warnings:
+            st.warning(message)
+
+        st.text("✅ Analysis complete!")
+        return analyzed_videos
+
+    def _process_video(self, video: Dict, search_terms: frozenset, region_code: str,
+                       now_utc: datetime, comments_response: Dict, warnings: List[str]) -> Dict:
+        """Build the analyzed record for one videos.list item."""
+        duration_sec = _duration_seconds(video['contentDetails']['duration'])
+
+        view_count = int(video['statistics'].get('viewCount', 0))
+        like_count = int(video['statistics'].get('likeCount', 0))
+        comment_count = int(video['statistics'].get('commentCount', 0))
+
+        # fromisoformat accepts the trailing "Z" as UTC
+        publish_date = datetime.fromisoformat(video['snippet']['publishedAt'])
+
+        days_since_publish = (now_utc - publish_date).days
+
+        video_data = {
+            'title': video['snippet']['title'],
+            'video_id': video['id'],
+            'url': f"https://www.youtube.com/watch?v={video['id']}",
+            'view_count': view_count,
+            'like_count': like_count,
+            'comment_count': comment_count,
+            'engagement_rate': round((like_count / view_count * 100), 2) if view_count > 0 else 0,
+            'duration': {
+                'seconds': duration_sec,
+                'formatted': _format_seconds(duration_sec)
+            },
+            'days_since_publish': days_since_publish,
+            'views_per_day': round(view_count / max(days_since_publish, 1)),
+            'tags': video['snippet'].get('tags', []),
+            'description': video['snippet']['description'],
+            'channel_title': video['snippet']['channelTitle'],
+            'category_id': video['snippet'].get('categoryId', 'N/A'),
+            'publish_date': publish_date.strftime('%Y-%m-%d'),
+            'region': self.regions[region_code]
+        }
+
+        # Add enhanced segment analysis
+        hooks = self._analyze_segments(video_data, search_terms, comments_response, warnings)
+        video_data['hooks'] = hooks
+        video_data['segment_count'] = (
+            len(hooks['comments']) + len(hooks['description']) + len(hooks['most_replayed'])
+        )
+        return video_data
+
     def display_video_segments(self, video: Dict):
         """Display segments from comments, description, and most replayed."""
         st.write("**🎯 Relevant Segments:**")
         
-        # Display segments from comments
+        # All cards are rendered with one st.markdown call instead of one per segment.
+        parts = []
+        
+        # Segments from comments
         if video['hooks']['comments']:
-            st.write("**🔥 Popular Segments from Comments:**")
+            parts.append("<p><strong>🔥 Popular Segments from Comments:</strong></p>")
             for hook in video['hooks']['comments']:
-                st.markdown(
-                    f"""
-                    <div style="padding: 10px; background-color: rgba(255, 99, 71, 0.2); border-radius: 5px; margin: 5px 0;">
-                        <strong>{hook['title']}</strong><br>
-                        Time: {str(timedelta(seconds=int(hook['start_time'])))} | Relevance: {hook['relevance_score'] * 100:.1f}%<br>
-                        <a href="{hook['url']}" target="_blank">🎥 Watch Segment</a>
-                    </div>
-                    """,
-                    unsafe_allow_html=True
-                )
+                parts.append(_SEGMENT_CARD.format(
+                    color="rgba(255, 99, 71, 0.2)",
+                    title=hook['title'],
+                    timestamp=hook['start_time_fmt'],
+                    relevance=hook['relevance_score'] * 100,
+                    url=hook['url']
+                ))
         
-        # Display segments from description
+        # Segments from description
         if video['hooks']['description']:
-            st.write("**📖 Relevant Segments from Description:**")
+            parts.append("<p><strong>📖 Relevant Segments from Description:</strong></p>")
             for hook in video['hooks']['description']:
-                st.markdown(
-                    f"""
-                    <div style="padding: 10px; background-color: rgba(0, 128, 0, 0.2); border-radius: 5px; margin: 5px 0;">
-                        <strong>{hook['title']}</strong><br>
-                        Time: {str(timedelta(seconds=int(hook['start_time'])))} | Relevance: {hook['relevance_score'] * 100:.1f}%<br>
-                        <a href="{hook['url']}" target="_blank">🎥 Watch Segment</a>
-                    </div>
-                    """,
-                    unsafe_allow_html=True
-                )
+                parts.append(_SEGMENT_CARD.format(
+                    color="rgba(0, 128, 0, 0.2)",
+                    title=hook['title'],
+                    timestamp=hook['start_time_fmt'],
+                    relevance=hook['relevance_score'] * 100,
+                    url=hook['url']
+                ))
         
-        # Display most replayed segments
+        # Most replayed segments
         if video['hooks']['most_replayed']:
-            st.write("**📊 Most Replayed Segments:**")
+            parts.append("<p><strong>📊 Most Replayed Segments:</strong></p>")
             for hook in video['hooks']['most_replayed']:
-                st.markdown(
-                    f"""
-                    <div style="padding: 10px; background-color: rgba(0, 0, 255, 0.2); border-radius: 5px; margin: 5px 0;">
-                        <strong>Most Replayed Segment</strong><br>
-                        Time: {str(timedelta(seconds=int(hook['start_time'])))} - {str(timedelta(seconds=int(hook['end_time'])))}<br>
-                        Intensity: {hook['intensity'] * 100:.1f}%<br>
-                        <a href="{video['url']}&t={int(hook['start_time'])}s" target="_blank">🎥 Watch Segment</a>
-                    </div>
-                    """,
-                    unsafe_allow_html=True
-                )
+                parts.append(_REPLAYED_CARD.format(
+                    start=hook['start_time_fmt'],
+                    end=hook['end_time_fmt'],
+                    intensity=hook['intensity'] * 100,
+                    url=f"{video['url']}&t={int(hook['start_time'])}s"
+                ))
+        
+        if parts:
+            st.markdown("\n".join(parts), unsafe_allow_html=True)
+
+@st.cache_resource(show_spinner=False)
+def get_analyzer(api_key: str) -> YouTubeLiteAnalyzer:
+    """Build the analyzer once per API key instead of on every rerun."""
+    return YouTubeLiteAnalyzer(api_key)
+
+@st.cache_data(ttl=600, show_spinner=False)
+def _run_analysis(api_key: str, query: str, max_results: int, duration_type: str,
+                  order_by: str, region_code: str, days_ago: int) -> List[Dict]:
+    """Analysis results for one parameter set, cached for 10 minutes."""
+    return get_analyzer(api_key)._analyze_videos_uncached(
+        query, max_results, duration_type, order_by, region_code, days_ago
+    )
 
 def main():
     st.set_page_config(
@@ -403,6 +635,11 @@ def main():
             help="Enter your YouTube Data API v3 key"
         )
         
+        if st.button("🧹 Clear cache", help="Drop cached search, video, comment and heatmap results"):
+            clear_response_cache()
+            st.cache_data.clear()
+            st.success("Cache cleared")
+        
         st.markdown("---")
         st.markdown("""
         ### 📖 Quick Guide
@@ -420,7 +657,7 @@ def main():
         st.stop()
     
     try:
-        analyzer = YouTubeLiteAnalyzer(api_key)
+        analyzer = get_analyzer(api_key)
         
         st.header("🔍 Search Parameters")
         
@@ -481,9 +718,9 @@ def main():
             **📊 Quota Usage Estimate:**
             - Search: {quota_info['search_cost']} units
             - Video details: {quota_info['video_details_cost']} units
-            - Comments analysis: {quota_info['comments_cost']} units
-            - Total: {quota_info['total_cost']} units
-            Daily limit: {quota_info['daily_limit']} units
+            - Comments analysis: up to {quota_info['comments_cost']} units
+            - Total: up to {quota_info['total_cost']} units
+            Remaining today: {quota_info['remaining']} of {quota_info['daily_limit']} units
             """)
         
         # Search button
@@ -511,14 +748,14 @@ def main():
                 # Add enhanced export
                 if st.download_button(
                     label="📥 Export Results",
-                    data=str(videos),
+                    data=export_json(videos),
                     file_name="youtube_analysis.json",
                     mime="application/json"
                 ):
                     st.success("Results exported successfully!")
                 
                 # Results summary
-                total_segments = sum(len(v.get('hooks', {}).get('comments', [])) + len(v.get('hooks', {}).get('description', [])) + len(v.get('hooks', {}).get('most_replayed', [])) for v in videos)
+                total_segments = sum(video['segment_count'] for video in videos)
                 st.markdown(f"Found **{len(videos)}** videos with **{total_segments}** relevant segments")
                 
                 # Enhanced video display
@@ -541,9 +778,8 @@ def main():
                         
                         with col2:
                             st.markdown(f"[🔗 Watch Full Video]({video['url']})")
-                            
-                            if st.button(f"📋 Copy URL", key=f"copy_{video['video_id']}"):
-                                st.code(video['url'])
+                            # st.code has a built-in copy icon, so no button rerun is needed
+                            st.code(video['url'], language=None)
                         
                         analyzer.display_video_segments(video)
                         st.markdown("---")
@@ -0,0 +1,52 @@
+import random
+
+import pytest
+
+pytest.importorskip('streamlit')
+pytest.importorskip('googleapiclient')
+
+import analyzer
+
+
+def _baseline(keywords, text):
+    return {word for word in keywords if word in text}
+
+
+@pytest.fixture
+def regex_matcher(monkeypatch):
+    """_keyword_matcher's regex fallback, built as if pyahocorasick were missing."""
+    monkeypatch.setattr(analyzer, 'ahocorasick', None)
+    return analyzer._keyword_matcher.__wrapped__
+
+
+@pytest.mark.parametrize('keywords, text', [
+    ({'abc', 'bcd'}, 'abcd'),
+    ({'ile', 'leg'}, 'mobilegame'),
+    ({'game', 'gamer'}, 'gamer'),
+    ({'best', 'top'}, 'bestop'),
+    ({'mobile', 'game', 'ads'}, 'no match here'),
+])
+def test_regex_fallback_finds_overlapping_keywords(regex_matcher, keywords, text):
+    assert regex_matcher(frozenset(keywords))(text) == _baseline(keywords, text)
+
+
+def test_regex_fallback_matches_substring_baseline(regex_matcher):
+    rng = random.Random(0)
+    for _ in range(2000):
+        keywords = frozenset(
+            ''.join(rng.choice('ab') for _ in range(rng.randint(1, 4)))
+            for _ in range(rng.randint(1, 5))
+        )
+        text = ''.join(rng.choice('ab') for _ in range(rng.randint(0, 12)))
+        assert regex_matcher(keywords)(text) == _baseline(keywords, text)
+
+
+def test_automaton_and_regex_fallback_agree(monkeypatch):
+    if analyzer.ahocorasick is None:
+        pytest.skip('pyahocorasick is not installed')
+    keywords = frozenset({'abc', 'bcd', 'ile', 'leg', 'game', 'gamer'})
+    automaton_matcher = analyzer._keyword_matcher.__wrapped__(keywords)
+    monkeypatch.setattr(analyzer, 'ahocorasick', None)
+    fallback_matcher = analyzer._keyword_matcher.__wrapped__(keywords)
+    for text in ('abcd', 'mobilegame', 'gamer', 'nothing'):
+        assert automaton_matcher(text) == fallback_matcher(text)